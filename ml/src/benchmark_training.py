@@ -0,0 +1,95 @@
+"""
+Scaling sweep for the training pipeline
+
+Reruns generate_dataset -> preprocess_data -> train_model for every
+combination of samples_per_career and nthread, each in a fresh process so
+peak RSS is per run, and writes the resulting curve as JSON.
+
+Usage:
+    python ml/src/benchmark_training.py --samples 50 100 200 400 --nthread 1 2 4
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from perf import PerfReport
+
+
+def run_pipeline(samples_per_career, nthread):
+    """Run the full pipeline once in a scratch directory and return its report"""
+    from generate_dataset import generate_dataset
+    from preprocess import preprocess_data
+    from train import train_model
+
+    perf = PerfReport()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = str(Path(tmp) / "training_data.csv")
+
+        with perf.stage("generate dataset") as stage:
+            df = generate_dataset(samples_per_career=samples_per_career, seed=42)
+            df.to_csv(data_path, index=False)
+            stage["rows"] = len(df)
+
+        # Keep the sweep output readable, the per-run logs are not needed
+        with contextlib.redirect_stdout(io.StringIO()):
+            preprocess_data(data_path, models_dir=tmp, perf=perf)
+            _, _, accuracy = train_model(data_path=data_path, models_dir=tmp,
+                                         nthread=nthread, perf=perf)
+
+    report = perf.to_dict()
+    report["samples_per_career"] = samples_per_career
+    report["accuracy"] = float(accuracy)
+    return report
+
+
+def summarize(report):
+    stages = {s["stage"]: s for s in report["stages"]}
+    return {
+        "samples_per_career": report["samples_per_career"],
+        "n_samples": report["n_samples"],
+        "nthread": report["nthread"],
+        "fit_seconds": stages["train: fit"]["wall_seconds"],
+        "total_seconds": report["total_wall_seconds"],
+        "total_cpu_seconds": report["total_cpu_seconds"],
+        "peak_rss_mb": report["peak_rss_mb"],
+        "inference_rows_per_sec": report["inference"]["batch_rows_per_sec"],
+        "accuracy": round(report["accuracy"], 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Training pipeline scaling sweep")
+    parser.add_argument("--samples", type=int, nargs="+", default=[50, 100, 200, 400])
+    parser.add_argument("--nthread", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--output", default="ml/models/scaling_report.json")
+    args = parser.parse_args(argv)
+
+    print(f"{'samples/career':>15}{'nthread':>9}{'fit (s)':>10}{'total (s)':>11}"
+          f"{'peak RSS (MB)':>15}{'infer rows/s':>14}{'accuracy':>10}")
+
+    runs = []
+    context = multiprocessing.get_context("spawn")
+    for samples_per_career in args.samples:
+        for nthread in args.nthread:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                report = pool.submit(run_pipeline, samples_per_career, nthread).result()
+            run = summarize(report)
+            runs.append({"summary": run, "report": report})
+
+            peak = f"{run['peak_rss_mb']:.1f}" if run["peak_rss_mb"] is not None else "n/a"
+            print(f"{run['samples_per_career']:>15}{run['nthread']:>9}{run['fit_seconds']:>10.2f}"
+                  f"{run['total_seconds']:>11.2f}{peak:>15}"
+                  f"{run['inference_rows_per_sec']:>14,.0f}{run['accuracy']:>10.4f}", flush=True)
+
+    with open(args.output, 'w') as f:
+        json.dump({"curve": [r["summary"] for r in runs], "runs": runs}, f, indent=2)
+    print(f"\nScaling report saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import random
+from perf import PerfReport, file_signature
 
 # Career categories matching the roadmaps
 CAREERS = [
@@ -156,8 +157,11 @@ def generate_sample(career, noise_level=0.2):
     sample["career"] = career
     return sample
 
-def generate_dataset(samples_per_career=200):
+def generate_dataset(samples_per_career=200, seed=None):
     """Generate complete training dataset"""
+    if seed is not None:
+        random.seed(seed)
+
     data = []
     for career in CAREERS:
         for _ in range(samples_per_career):
@@ -174,11 +178,15 @@ def generate_dataset(samples_per_career=200):
     return df
 
 if __name__ == "__main__":
+    perf = PerfReport()
+
     print("Generating training dataset...")
-    df = generate_dataset(samples_per_career=200)
+    with perf.stage("generate dataset", rows=200 * len(CAREERS)):
+        df = generate_dataset(samples_per_career=200)
 
     output_path = "ml/data/training_data.csv"
-    df.to_csv(output_path, index=False)
+    with perf.stage("save dataset", rows=len(df)):
+        df.to_csv(output_path, index=False)
 
     print(f"Dataset generated: {len(df)} samples")
     print(f"Saved to: {output_path}")
@@ -186,3 +194,9 @@ if __name__ == "__main__":
     print(df["career"].value_counts().sort_index())
     print(f"\nSample row:")
     print(df.head(1).to_dict('records'))
+    print()
+    perf.print_summary()
+
+    # Picked up by train.py so its report covers the whole pipeline
+    perf.extra["source"] = file_signature(output_path)
+    perf.write("ml/data/generate_report.json")
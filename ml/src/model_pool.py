@@ -0,0 +1,247 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
+from pathlib import Path
+
+import joblib
+
+from progressive import FeatureLayout
+
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+class UnknownVersion(Exception):
+    """No bundle directory exists for the requested model version"""
+
+
+class ModelBundle:
+    """
+    Everything needed to serve one questionnaire/model version: the model,
+    its classes and feature order, the answer schema and the subcareers table
+    """
+
+    def __init__(self, version, model, classes, feature_names, metadata,
+                 behavioral_options, academic_scores, subcareers):
+        self.version = version
+        self.model = model
+        self.booster = model.get_booster()
+        self.classes = list(classes)
+        self.feature_names = list(feature_names)
+        self.metadata = metadata
+        self.behavioral_options = behavioral_options
+        self.academic_scores = academic_scores
+        self.subcareers = subcareers
+        # Serialized booster size as an estimate of its in-memory footprint
+        self.size_bytes = len(self.booster.save_raw("ubj"))
+
+    @cached_property
+    def layout(self):
+        """Feature positions for building rows from option indices"""
+        return FeatureLayout(self.feature_names)
+
+    def parse_answer(self, question_id, answer_text, default=0):
+        """
+        Parse answer text to its option index (0-3) under this bundle's
+        schema, or `default` if the text is not one of the options
+        """
+        if question_id >= 24:
+            return self.academic_scores.get(answer_text, default)
+        options = self.behavioral_options.get(question_id, [])
+        if answer_text in options:
+            return options.index(answer_text)
+        return default
+
+    def option_text(self, question_id, option_index):
+        """Answer text for an option index, the inverse of parse_answer"""
+        if question_id >= 24:
+            return list(self.academic_scores)[option_index]
+        return self.behavioral_options[question_id][option_index]
+
+
+def load_bundle(models_dir, version=None, behavioral_options=None,
+                academic_scores=None, subcareers=None):
+    """
+    Load a model bundle from a directory laid out like ml/models
+
+    answer_schema.json ({"behavioral_options": {...}, "academic_scores": {...}})
+    and subcareers.json are optional; the given defaults are used without them.
+    """
+    models_dir = Path(models_dir)
+    model = joblib.load(models_dir / "career_model.pkl")
+    label_encoder = joblib.load(models_dir / "label_encoder.pkl")
+
+    with open(models_dir / "feature_names.json", 'r') as f:
+        feature_names = json.load(f)
+
+    metadata = {}
+    metadata_path = models_dir / "model_metadata.json"
+    if metadata_path.exists():
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+
+    schema_path = models_dir / "answer_schema.json"
+    if schema_path.exists():
+        with open(schema_path, 'r') as f:
+            schema = json.load(f)
+        behavioral_options = {
+            int(q_id): options for q_id, options in schema["behavioral_options"].items()
+        }
+        academic_scores = schema["academic_scores"]
+
+    subcareers_path = models_dir / "subcareers.json"
+    if subcareers_path.exists():
+        with open(subcareers_path, 'r') as f:
+            subcareers = json.load(f)
+
+    return ModelBundle(
+        version=version or metadata.get("version", models_dir.name),
+        model=model,
+        classes=label_encoder.classes_,
+        feature_names=feature_names,
+        metadata=metadata,
+        behavioral_options=behavioral_options or {},
+        academic_scores=academic_scores or {},
+        subcareers=subcareers or {},
+    )
+
+
+class _PendingLoad:
+    """A bundle load in progress that other requests for the version wait on"""
+
+    __slots__ = ("done", "bundle", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.bundle = None
+        self.error = None
+
+
+class ModelPool:
+    """
+    Lazily loaded, memory-budgeted LRU of model bundles keyed by version.
+
+    The default bundle lives in `root` itself and is pinned; other versions
+    live in `root/<version>/`. Concurrent first requests for a version share
+    a single load.
+    """
+
+    def __init__(self, root, default_bundle, budget_mb=512, **bundle_defaults):
+        self.root = Path(root)
+        self.default_version = default_bundle.version
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._bundle_defaults = bundle_defaults
+        self._lock = threading.Lock()
+        self._bundles = OrderedDict({default_bundle.version: default_bundle})
+        self._loading = {}
+        self._metrics = {}
+        self._evictions = 0
+        self._metric(default_bundle.version)
+
+    def _metric(self, version):
+        return self._metrics.setdefault(version, {
+            "hits": 0, "loads": 0, "load_seconds": 0.0, "last_used": None
+        })
+
+    def _hit(self, version):
+        """Look up a loaded bundle and record the hit, caller holds the lock"""
+        bundle = self._bundles.get(version)
+        if bundle is not None:
+            self._bundles.move_to_end(version)
+            metric = self._metric(version)
+            metric["hits"] += 1
+            metric["last_used"] = time.time()
+        return bundle
+
+    def peek(self, version=None):
+        """Return a loaded bundle without blocking, or None if it needs loading"""
+        version = version or self.default_version
+        with self._lock:
+            return self._hit(version)
+
+    def get(self, version=None):
+        """
+        Return the bundle for a version, loading it on first use.
+
+        Raises UnknownVersion if the version has no bundle directory; any
+        error while loading an existing bundle propagates to every request
+        waiting on that load.
+        """
+        version = version or self.default_version
+        bundle = self.peek(version)
+        if bundle is not None:
+            return bundle
+
+        path = self.root / version
+        if not VERSION_PATTERN.match(version) or not (path / "career_model.pkl").exists():
+            raise UnknownVersion(version)
+
+        with self._lock:
+            # A load may have finished since peek() released the lock
+            bundle = self._hit(version)
+            if bundle is not None:
+                return bundle
+            pending = self._loading.get(version)
+            owner = pending is None
+            if owner:
+                pending = self._loading[version] = _PendingLoad()
+
+        if not owner:
+            # Another request is already loading this version
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.bundle
+
+        try:
+            start = time.perf_counter()
+            bundle = load_bundle(path, version=version, **self._bundle_defaults)
+            with self._lock:
+                self._bundles[version] = bundle
+                metric = self._metric(version)
+                metric["loads"] += 1
+                metric["load_seconds"] += time.perf_counter() - start
+                metric["last_used"] = time.time()
+                self._evict()
+            pending.bundle = bundle
+            return bundle
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(version)
+            pending.done.set()
+
+    def _evict(self):
+        """Drop least recently used bundles until the pool fits its budget"""
+        total = sum(b.size_bytes for b in self._bundles.values())
+        for version in list(self._bundles):
+            if total <= self.budget_bytes or len(self._bundles) <= 2:
+                break
+            if version == self.default_version:
+                continue
+            total -= self._bundles.pop(version).size_bytes
+            self._evictions += 1
+
+    def stats(self):
+        with self._lock:
+            loaded = {
+                version: {
+                    "size_mb": round(bundle.size_bytes / (1024 * 1024), 2),
+                    "pinned": version == self.default_version,
+                }
+                for version, bundle in self._bundles.items()
+            }
+            return {
+                "default_version": self.default_version,
+                "budget_mb": round(self.budget_bytes / (1024 * 1024), 2),
+                "used_mb": round(sum(b.size_bytes for b in self._bundles.values()) / (1024 * 1024), 2),
+                "evictions": self._evictions,
+                "bundles": {
+                    version: {**metric, "loaded": version in loaded, **loaded.get(version, {})}
+                    for version, metric in self._metrics.items()
+                },
+            }
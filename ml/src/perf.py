@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def current_rss_mb():
+    """Current resident set size of this process in MB, or None if unavailable"""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def file_signature(path):
+    """Resolved path and mtime, ties a saved report to the data file it describes"""
+    return {"path": str(Path(path).resolve()), "mtime": os.stat(path).st_mtime}
+
+
+def upstream_stages(report_path, data_path):
+    """
+    Stages of a saved report if it was recorded for data_path as the file is
+    now, otherwise [] (missing report, or data regenerated since)
+    """
+    try:
+        with open(report_path, 'r') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if report.get("source") != file_signature(data_path):
+        return []
+    return report["stages"]
+
+
+class StagePeak:
+    """
+    Peak RSS over one stage rather than over the process lifetime.
+
+    On Linux the kernel's high-water mark (VmHWM) is reset by writing 5 to
+    /proc/self/clear_refs, so the value read at the end covers only this
+    stage. Elsewhere a background thread samples the current RSS, which can
+    miss spikes shorter than SAMPLE_INTERVAL.
+    """
+
+    SAMPLE_INTERVAL = 0.01
+
+    def __init__(self):
+        self.peak = None
+        self._use_hwm = False
+        self._sampler = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        self._use_hwm = self._reset_hwm()
+        if self._use_hwm:
+            return
+        self.peak = current_rss_mb()
+        if self.peak is None:
+            return
+        self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        """Return the stage's peak RSS in MB, or None if it cannot be measured"""
+        if self._sampler is not None:
+            self._stop_event.set()
+            self._sampler.join()
+            return max(self.peak, current_rss_mb())
+        if self._use_hwm:
+            return self._read_hwm()
+        return None
+
+    @staticmethod
+    def _reset_hwm():
+        try:
+            with open("/proc/self/clear_refs", 'w') as f:
+                f.write("5")
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _read_hwm():
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+        return None
+
+    def _sample_loop(self):
+        while not self._stop_event.wait(self.SAMPLE_INTERVAL):
+            self.peak = max(self.peak, current_rss_mb())
+
+
+class PerfReport:
+    """
+    Collects wall time, CPU time and peak RSS per pipeline stage.
+
+    Stages must not be nested: on Linux starting a stage resets the
+    high-water mark that an enclosing stage would read.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.extra = {}
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        stage_peak = StagePeak()
+        stage_peak.start()
+        record = {"stage": name}
+        try:
+            yield record
+        finally:
+            record["wall_seconds"] = round(time.perf_counter() - wall_start, 4)
+            record["cpu_seconds"] = round(time.process_time() - cpu_start, 4)
+            peak = stage_peak.stop()
+            record["peak_rss_mb"] = round(peak, 1) if peak is not None else None
+            rows = record.get("rows", rows)
+            if rows:
+                record["rows"] = rows
+                record["rows_per_sec"] = round(rows / max(record["wall_seconds"], 1e-9), 1)
+            self.stages.append(record)
+
+    def to_dict(self):
+        peaks = [s["peak_rss_mb"] for s in self.stages if s["peak_rss_mb"] is not None]
+        return {
+            "stages": self.stages,
+            "total_wall_seconds": round(sum(s["wall_seconds"] for s in self.stages), 4),
+            "total_cpu_seconds": round(sum(s["cpu_seconds"] for s in self.stages), 4),
+            "peak_rss_mb": max(peaks) if peaks else None,
+            **self.extra,
+        }
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def print_summary(self):
+        print(f"{'Stage':<28}{'Wall (s)':>10}{'CPU (s)':>10}{'Peak RSS (MB)':>15}")
+        for s in self.stages:
+            peak = f"{s['peak_rss_mb']:.1f}" if s["peak_rss_mb"] is not None else "n/a"
+            print(f"{s['stage']:<28}{s['wall_seconds']:>10.3f}{s['cpu_seconds']:>10.3f}{peak:>15}")
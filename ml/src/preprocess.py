@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import LabelEncoder
 import joblib
+from perf import PerfReport, file_signature
 
 def extract_features(df):
     """
@@ -102,31 +103,47 @@ def extract_features(df):
 
     return features
 
-def preprocess_data(input_path, output_path=None):
+def iter_feature_chunks(input_path, chunk_size=100000):
+    """
+    Stream (features, careers) chunks from a raw answers CSV so datasets
+    larger than memory can be preprocessed
+    """
+    for df in pd.read_csv(input_path, chunksize=chunk_size):
+        yield extract_features(df), df['career']
+
+def preprocess_data(input_path, output_path=None, models_dir="ml/models", perf=None):
     """
     Preprocess training data
     """
-    print(f"Loading data from {input_path}...")
-    df = pd.read_csv(input_path)
+    perf = perf or PerfReport()
 
-    print(f"Extracting features...")
-    X = extract_features(df)
+    with perf.stage("preprocess: load") as stage:
+        print(f"Loading data from {input_path}...")
+        df = pd.read_csv(input_path)
+        stage["rows"] = len(df)
 
-    print(f"Encoding target variable...")
-    y = df['career']
-    le = LabelEncoder()
-    y_encoded = le.fit_transform(y)
+    with perf.stage("preprocess: extract features", rows=len(df)):
+        print(f"Extracting features...")
+        X = extract_features(df)
 
-    # Save label encoder
-    joblib.dump(le, 'ml/models/label_encoder.pkl')
-    print(f"Saved label encoder to ml/models/label_encoder.pkl")
+    with perf.stage("preprocess: encode target", rows=len(df)):
+        print(f"Encoding target variable...")
+        y = df['career']
+        le = LabelEncoder()
+        y_encoded = le.fit_transform(y)
+
+        # Save label encoder
+        encoder_path = f"{models_dir}/label_encoder.pkl"
+        joblib.dump(le, encoder_path)
+        print(f"Saved label encoder to {encoder_path}")
 
     # Save processed data
     if output_path:
-        X['career_encoded'] = y_encoded
-        X['career'] = y
-        X.to_csv(output_path, index=False)
-        print(f"Saved preprocessed data to {output_path}")
+        with perf.stage("preprocess: save", rows=len(df)):
+            X['career_encoded'] = y_encoded
+            X['career'] = y
+            X.to_csv(output_path, index=False)
+            print(f"Saved preprocessed data to {output_path}")
 
     print(f"\nFeature shape: {X.shape}")
     print(f"Classes: {list(le.classes_)}")
@@ -134,8 +151,16 @@ def preprocess_data(input_path, output_path=None):
     return X, y_encoded, le
 
 if __name__ == "__main__":
+    perf = PerfReport()
     X, y, le = preprocess_data(
         "ml/data/training_data.csv",
-        "ml/data/processed_data.csv"
+        "ml/data/processed_data.csv",
+        perf=perf
     )
     print("\nPreprocessing complete!")
+    print()
+    perf.print_summary()
+
+    # Picked up by train.py so its report covers the whole pipeline
+    perf.extra["source"] = file_signature("ml/data/training_data.csv")
+    perf.write("ml/data/preprocess_report.json")
@@ -0,0 +1,210 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MODES = ("sample", "cpu", "memory")
+MAX_SECONDS = 300
+MAX_REQUESTS = 100000
+SAMPLE_INTERVAL = 0.005
+TRACEMALLOC_FRAMES = 25
+
+# Only one session may run at a time; the last finished one is kept for retrieval
+_active = None
+_last = None
+_lock = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    """
+    One bounded profiling window over the event loop thread
+
+    Must be started and stopped from the event loop thread: cProfile only
+    hooks the thread that enables it.
+    """
+
+    def __init__(self, mode, seconds=None, requests=None):
+        self.mode = mode
+        self.seconds = seconds
+        self.max_requests = requests
+        self.requests_seen = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._thread_id = threading.get_ident()
+        self._profiler = None
+        self._sampler = None
+        self._samples = Counter()
+        self._snapshot = None
+        self._started_tracemalloc = False
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self):
+        return self.started_at is not None and self.stopped_at is None
+
+    def start(self):
+        self.started_at = time.time()
+        if self.mode == "cpu":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.mode == "memory":
+            # Leave tracing alone if something else (e.g. PYTHONTRACEMALLOC)
+            # already started it, and only stop what we started
+            self._started_tracemalloc = not tracemalloc.is_tracing()
+            if self._started_tracemalloc:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+        else:
+            self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        if self.mode == "cpu":
+            self._profiler.disable()
+        elif self.mode == "memory":
+            self._snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ))
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        else:
+            self._stop_event.set()
+            self._sampler.join()
+        self.stopped_at = time.time()
+
+    def on_request(self):
+        """Count a finished request, returns True once the request budget is spent"""
+        self.requests_seen += 1
+        return self.max_requests is not None and self.requests_seen >= self.max_requests
+
+    def _sample_loop(self):
+        while not self._stop_event.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self._samples[";".join(reversed(stack))] += 1
+
+    def summary(self):
+        return {
+            "mode": self.mode,
+            "running": self.running,
+            "seconds": self.seconds,
+            "max_requests": self.max_requests,
+            "requests_seen": self.requests_seen,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
+
+    def render(self, fmt="text", limit=40):
+        """
+        Render results as text or as collapsed stacks (flamegraph.pl / speedscope)
+        """
+        if self.mode == "cpu":
+            if fmt == "collapsed":
+                raise ValueError("collapsed output is only available for sample and memory modes")
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+            return out.getvalue()
+
+        if self.mode == "memory":
+            if fmt == "collapsed":
+                lines = []
+                for stat in self._snapshot.statistics("traceback"):
+                    frames = ";".join(
+                        f"{frame.filename.rsplit('/', 1)[-1]}:{frame.lineno}"
+                        for frame in stat.traceback
+                    )
+                    lines.append(f"{frames} {stat.size}")
+                return "\n".join(lines) + "\n"
+            stats = self._snapshot.statistics("lineno")
+            lines = [f"Top {limit} allocation sites ({len(stats)} total)"]
+            lines += [str(stat) for stat in stats[:limit]]
+            return "\n".join(lines) + "\n"
+
+        if fmt == "collapsed":
+            return "".join(f"{stack} {count}\n" for stack, count in self._samples.items())
+        total = sum(self._samples.values())
+        lines = [f"{total} samples at {SAMPLE_INTERVAL * 1000:.0f}ms interval"]
+        for stack, count in self._samples.most_common(limit):
+            lines.append(f"{count:6d} {100 * count / max(total, 1):5.1f}%  {stack.rsplit(';', 1)[-1]}")
+            lines.append(f"         {stack}")
+        return "\n".join(lines) + "\n"
+
+
+def start_session(mode, seconds=None, requests=None):
+    """
+    Start a profiling window, raises RuntimeError if one is already running
+    """
+    global _active
+
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    if seconds is None and requests is None:
+        seconds = 30
+    if seconds is not None:
+        seconds = min(float(seconds), MAX_SECONDS)
+    if requests is not None:
+        requests = min(int(requests), MAX_REQUESTS)
+
+    with _lock:
+        if _active is not None:
+            raise RuntimeError("a profiling session is already running")
+        session = ProfileSession(mode, seconds=seconds, requests=requests)
+        session.start()
+        _active = session
+    return session
+
+
+def stop_session(expected=None):
+    """
+    Stop the running session, if any, and keep it as the last result.
+    With expected set, only stop if that session is still the running one.
+    """
+    global _active, _last
+
+    with _lock:
+        session = _active
+        if session is None or (expected is not None and session is not expected):
+            return None
+        session.stop()
+        _active = None
+        _last = session
+    return session
+
+
+def current_session():
+    return _active or _last
+
+
+class RequestWindowMiddleware:
+    """
+    ASGI middleware that ends a request-bounded session; a single global
+    check per request when no session is running
+    """
+
+    def __init__(self, app, exclude_prefix="/debug"):
+        self.app = app
+        self.exclude_prefix = exclude_prefix
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+        session = _active
+        if session is None or scope["type"] != "http":
+            return
+        if scope["path"].startswith(self.exclude_prefix):
+            return
+        if session.on_request():
+            stop_session(session)
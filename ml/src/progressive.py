@@ -0,0 +1,153 @@
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+# Derived features and the question columns they are computed from. These
+# mirror service.extract_features_from_answers so a session that has received
+# every answer produces exactly the /predict feature row.
+AGGREGATE_FEATURES = {
+    "technical_aptitude": ["q24", "q25", "q28"],
+    "scientific_foundation": ["q24", "q25", "q26"],
+    "medical_aptitude": ["q26", "q25"],
+    "business_aptitude": ["q27", "q24"],
+    "creative_aptitude": ["q29"],
+    "social_aptitude": ["q30"],
+}
+
+# Trait = sum of the answer values that fall in the trait's option set
+TRAIT_FEATURES = {
+    "analytical_trait": (["q4", "q11", "q13", "q15", "q18", "q20"], (0,)),
+    "social_trait": (["q6", "q8", "q13", "q15", "q17", "q21", "q22"], (1, 3)),
+    "creative_trait": (["q10", "q14", "q15", "q17", "q20", "q21"], (2,)),
+    "technical_trait": (["q5", "q9", "q10", "q14"], (0, 2)),
+    "management_trait": (["q8", "q12", "q19", "q23"], (0, 2)),
+}
+
+
+class FeatureLayout:
+    """
+    Precomputed column positions and, for each question, the derived
+    features that depend on it
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = list(feature_names)
+        position = {name: i for i, name in enumerate(self.feature_names)}
+
+        self.question_index = {
+            int(name[1:]): i for name, i in position.items()
+            if name.startswith("q") and name[1:].isdigit()
+        }
+
+        # (target position, input positions, trait options or None for a mean);
+        # derived features a model was not trained with are skipped
+        specs = [
+            (name, questions, None) for name, questions in AGGREGATE_FEATURES.items()
+        ] + [
+            (name, questions, options) for name, (questions, options) in TRAIT_FEATURES.items()
+        ]
+        self.derived = [
+            (position[name], np.array([position[q] for q in questions]), options)
+            for name, questions, options in specs
+            if name in position and all(q in position for q in questions)
+        ]
+
+        self.dependents = {q_id: [] for q_id in self.question_index}
+        for target, inputs, options in self.derived:
+            for i in inputs:
+                q_id = int(self.feature_names[i][1:])
+                self.dependents[q_id].append((target, inputs, options))
+
+    def build_rows(self, question_ids, answers):
+        """
+        Vectorized feature rows from an (n, len(question_ids)) matrix of
+        option indices
+        """
+        rows = np.zeros((len(answers), len(self.feature_names)), dtype=np.float32)
+        rows[:, [self.question_index[q_id] for q_id in question_ids]] = answers
+        for target, inputs, options in self.derived:
+            values = rows[:, inputs]
+            if options is None:
+                rows[:, target] = values.mean(axis=1)
+            else:
+                rows[:, target] = (values * np.isin(values, options)).sum(axis=1)
+        return rows
+
+
+class SessionState:
+    """
+    Feature row for one in-progress questionnaire under one model version.
+    Unanswered questions and derived features with no answered inputs are
+    NaN, which the booster treats as missing, rather than a fabricated
+    option 0.
+    """
+
+    __slots__ = ("session_id", "version", "layout", "values", "answered", "last_seen")
+
+    def __init__(self, session_id, layout, version=None):
+        self.session_id = session_id
+        self.version = version
+        self.layout = layout
+        self.values = np.full((1, len(layout.feature_names)), np.nan, dtype=np.float32)
+        self.answered = set()
+        self.last_seen = time.monotonic()
+
+    def update(self, question_id, option_index):
+        """
+        Set one answer and recompute only the derived features it feeds,
+        from the inputs answered so far
+        """
+        layout = self.layout
+        row = self.values[0]
+        row[layout.question_index[question_id]] = option_index
+        for target, inputs, options in layout.dependents[question_id]:
+            answers = row[inputs]
+            answers = answers[~np.isnan(answers)]
+            if options is None:
+                row[target] = answers.mean()
+            else:
+                row[target] = answers[np.isin(answers, options)].sum()
+        self.answered.add(question_id)
+        self.last_seen = time.monotonic()
+
+
+class SessionStore:
+    """
+    Bounded LRU of progressive sessions; the least recently updated session
+    is evicted when capacity is reached
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.evicted = 0
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def create(self, layout, version=None, session_id=None):
+        session_id = session_id or uuid.uuid4().hex
+        while len(self._sessions) >= self.capacity:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+        session = SessionState(session_id, layout, version)
+        self._sessions[session_id] = session
+        return session
+
+    def discard(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    def stats(self):
+        return {
+            "sessions": len(self._sessions),
+            "capacity": self.capacity,
+            "evicted": self.evicted,
+        }
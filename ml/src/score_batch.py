@@ -0,0 +1,217 @@
+"""
+Offline bulk scoring of raw answer files (q4-q30 layout of training_data.csv)
+
+Usage:
+    python ml/src/score_batch.py answers.csv scored/ --workers 4
+    python ml/src/score_batch.py answers.parquet scored/ --format csv
+
+Output is written as one Parquet part file per input chunk. Re-running the
+same command after an interruption skips chunks whose part file already
+exists; _manifest.json in the output directory records the input, model and
+encoder files and the chunking, so a run with a different input, model or
+chunk size is refused rather than mixed into the old output (use
+--restart to start over).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from preprocess import extract_features
+
+TOP_K = 3
+
+# Per-worker model state, loaded once by the pool initializer
+_model = None
+_classes = None
+
+
+def _init_worker(model_path, encoder_path):
+    """Load the model once per worker process"""
+    global _model, _classes
+
+    _model = joblib.load(model_path)
+    # Parallelism comes from the process pool, keep each booster single-threaded
+    _model.set_params(n_jobs=1)
+    _classes = np.asarray(joblib.load(encoder_path).classes_)
+
+
+def iter_chunks(input_path, chunk_size):
+    """
+    Stream raw answer chunks from a CSV or Parquet file
+    """
+    if str(input_path).endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(input_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=chunk_size)
+
+
+def score_chunk(chunk_id, start_row, df, output_dir, output_format):
+    """
+    Score one chunk and write its part file, returns (chunk_id, n_rows)
+    """
+    X = extract_features(df)
+    probabilities = _model.predict_proba(X)
+
+    top_indices = np.argsort(-probabilities, axis=1)[:, :TOP_K]
+    top_probabilities = np.take_along_axis(probabilities, top_indices, axis=1)
+
+    result = pd.DataFrame({"row_id": np.arange(start_row, start_row + len(df))})
+    for rank in range(TOP_K):
+        result[f"career_{rank + 1}"] = _classes[top_indices[:, rank]]
+        result[f"probability_{rank + 1}"] = top_probabilities[:, rank].round(4)
+
+    # Write to a temp name and rename so a killed worker never leaves a
+    # partial part file that would be skipped on resume
+    part_path = Path(output_dir) / f"part-{chunk_id:06d}.{output_format}"
+    tmp_path = part_path.with_suffix(part_path.suffix + ".tmp")
+    if output_format == "parquet":
+        result.to_parquet(tmp_path, index=False)
+    else:
+        result.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, part_path)
+
+    return chunk_id, len(df)
+
+
+def _file_identity(path):
+    """Resolved path, size and mtime of a file"""
+    stat = os.stat(path)
+    return {"path": str(Path(path).resolve()), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def check_manifest(input_path, output_dir, model_path, encoder_path,
+                   chunk_size, output_format, restart=False):
+    """
+    Make sure existing part files were scored from this input, with this
+    model and chunking, then record the run in _manifest.json
+    """
+    manifest_path = output_dir / "_manifest.json"
+    source = {
+        "input": _file_identity(input_path),
+        "model": _file_identity(model_path),
+        "encoder": _file_identity(encoder_path),
+        "chunk_size": chunk_size,
+        "format": output_format,
+    }
+
+    parts = list(output_dir.glob("part-*"))
+    if restart:
+        for part in parts:
+            part.unlink()
+        manifest_path.unlink(missing_ok=True)
+    elif manifest_path.exists():
+        with open(manifest_path, 'r') as f:
+            previous = json.load(f)
+        changed = sorted(
+            key for key in source.keys() | previous.keys()
+            if previous.get(key) != source.get(key)
+        )
+        if changed:
+            raise SystemExit(
+                f"{output_dir} holds output from a different run "
+                f"(changed: {', '.join(changed)}); use --restart to score from scratch"
+            )
+    elif parts:
+        raise SystemExit(
+            f"{output_dir} has part files but no _manifest.json; "
+            f"use --restart to score from scratch"
+        )
+
+    with open(manifest_path, 'w') as f:
+        json.dump(source, f, indent=2)
+
+
+def score_file(input_path, output_dir, model_path, encoder_path,
+               chunk_size=50000, workers=None, output_format="parquet", restart=False):
+    """
+    Score every row of input_path across a process pool
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    check_manifest(input_path, output_dir, model_path, encoder_path,
+                   chunk_size, output_format, restart)
+
+    done = {
+        int(p.name.split("-")[1].split(".")[0])
+        for p in output_dir.glob(f"part-*.{output_format}")
+    }
+    if done:
+        print(f"Resuming: {len(done)} chunks already scored")
+
+    rows_scored = 0
+    rows_skipped = 0
+    start_time = time.perf_counter()
+    pending = set()
+
+    def report(finished):
+        nonlocal rows_scored
+        for future in finished:
+            _, n_rows = future.result()
+            rows_scored += n_rows
+        elapsed = time.perf_counter() - start_time
+        print(f"  scored {rows_scored:,} rows "
+              f"({rows_scored / max(elapsed, 1e-9):,.0f} rows/sec)", flush=True)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(model_path), str(encoder_path))) as pool:
+        start_row = 0
+        for chunk_id, df in enumerate(iter_chunks(input_path, chunk_size)):
+            if chunk_id in done:
+                rows_skipped += len(df)
+            else:
+                # Bound in-flight chunks so memory stays constant on large files
+                if len(pending) >= 2 * workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    report(finished)
+                pending.add(pool.submit(score_chunk, chunk_id, start_row, df,
+                                        output_dir, output_format))
+            start_row += len(df)
+
+        if pending:
+            report(wait(pending).done)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\n[OK] Scored {rows_scored:,} rows in {elapsed:.1f}s "
+          f"({rows_scored / max(elapsed, 1e-9):,.0f} rows/sec)")
+    if rows_skipped:
+        print(f"[OK] Skipped {rows_skipped:,} rows from previous run")
+    print(f"[OK] Output written to {output_dir}")
+
+    return rows_scored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-score a file of raw answers")
+    parser.add_argument("input", help="CSV or Parquet file with q4-q30 columns")
+    parser.add_argument("output_dir", help="Directory for scored part files")
+    parser.add_argument("--model", default="ml/models/career_model.pkl")
+    parser.add_argument("--encoder", default="ml/models/label_encoder.pkl")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--restart", action="store_true",
+                        help="Discard existing output instead of resuming")
+    args = parser.parse_args(argv)
+
+    score_file(
+        args.input, args.output_dir, args.model, args.encoder,
+        chunk_size=args.chunk_size, workers=args.workers,
+        output_format=args.format, restart=args.restart
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
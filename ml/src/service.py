@@ -1,12 +1,22 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Header, BackgroundTasks
+from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 from typing import List, Dict, Optional
-import joblib
 import numpy as np
 import pandas as pd
 import json
+import os
+import secrets
+import asyncio
+import time
 from pathlib import Path
+import profiling
+from shadow import ShadowEvaluator
+from progressive import SessionStore
+from model_pool import ModelPool, UnknownVersion, load_bundle
+from similarity import HammingIndex, QUESTION_COLUMNS
 
 app = FastAPI(title="Career Prediction Service", version="2.0")
 
@@ -18,35 +28,73 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(profiling.RequestWindowMiddleware)
+
+# Debug endpoints are disabled unless a token is configured
+DEBUG_TOKEN = os.environ.get("CAREER_DEBUG_TOKEN")
 
 # Global model variables
 model = None
-label_encoder = None
-feature_names = None
 model_metadata = None
+default_bundle = None
+model_pool = None
+similarity_index = None
+shadow_evaluator = None
+session_store = None
 
 def load_models():
     """Load trained models and metadata"""
-    global model, label_encoder, feature_names, model_metadata
+    global model, model_metadata, default_bundle, model_pool
+    global similarity_index, shadow_evaluator, session_store
 
     try:
-        model_path = Path("../models/career_model.pkl")
-        encoder_path = Path("../models/label_encoder.pkl")
-        features_path = Path("../models/feature_names.json")
-        metadata_path = Path("../models/model_metadata.json")
+        models_root = Path("../models")
+        respondents_path = Path("../data/training_data.csv")
+
+        # Bundles without their own answer_schema.json / subcareers.json use
+        # the tables in this module
+        bundle_defaults = dict(
+            behavioral_options=BEHAVIORAL_OPTIONS,
+            academic_scores=ACADEMIC_SCORE_MAPPING,
+            subcareers=SUBCAREERS
+        )
+
+        # Default bundle is loaded eagerly, other questionnaire versions in
+        # ../models/<version>/ load on first request
+        default_bundle = load_bundle(models_root, **bundle_defaults)
+        model_pool = ModelPool(
+            models_root, default_bundle,
+            budget_mb=float(os.environ.get("CAREER_MODEL_POOL_MB", "512")),
+            **bundle_defaults
+        )
 
-        model = joblib.load(model_path)
-        label_encoder = joblib.load(encoder_path)
+        model = default_bundle.model
+        model_metadata = default_bundle.metadata
 
-        with open(features_path, 'r') as f:
-            feature_names = json.load(f)
+        session_store = SessionStore(
+            capacity=int(os.environ.get("CAREER_MAX_SESSIONS", "10000"))
+        )
 
-        with open(metadata_path, 'r') as f:
-            model_metadata = json.load(f)
+        if respondents_path.exists():
+            similarity_index = HammingIndex.from_csv(respondents_path)
 
         print(f"[OK] Model loaded successfully")
         print(f"[OK] Model accuracy: {model_metadata['accuracy']*100:.2f}%")
-        print(f"[OK] Classes: {len(label_encoder.classes_)}")
+        print(f"[OK] Classes: {len(default_bundle.classes)}")
+        if similarity_index is not None:
+            print(f"[OK] Similarity index: {len(similarity_index)} respondents")
+
+        # Optional candidate model evaluated in shadow on sampled traffic
+        shadow_dir = os.environ.get("CAREER_SHADOW_MODEL_DIR")
+        if shadow_dir:
+            shadow_evaluator = ShadowEvaluator(
+                load_bundle(shadow_dir, **bundle_defaults),
+                sample_rate=float(os.environ.get("CAREER_SHADOW_SAMPLE_RATE", "0.1")),
+                queue_size=int(os.environ.get("CAREER_SHADOW_QUEUE_SIZE", "256")),
+                cpu_share=float(os.environ.get("CAREER_SHADOW_CPU_SHARE", "0.25"))
+            )
+            print(f"[OK] Shadow model loaded from {shadow_dir} "
+                  f"(sample rate {shadow_evaluator.sample_rate})")
 
     except Exception as e:
         print(f"Error loading models: {e}")
@@ -62,50 +110,43 @@ class Answer(BaseModel):
     value: str
 
 class PredictionRequest(BaseModel):
+    # model_version is part of the public API, allow the "model_" prefix
+    model_config = ConfigDict(protected_namespaces=())
+
     answers: List[Answer]
+    neighbors: int = Field(0, ge=0, le=50)
+    model_version: Optional[str] = None
 
 class CareerPrediction(BaseModel):
     career: str
     confidence: float
     subcareers: List[str]
 
+class SimilarRespondent(BaseModel):
+    career: str
+    distance: int
+
 class PredictionResponse(BaseModel):
     predictions: List[CareerPrediction]
     metadata: Dict
+    similar_respondents: Optional[List[SimilarRespondent]] = None
 
-def extract_features_from_answers(answers: List[Answer]) -> pd.DataFrame:
+def extract_features_from_answers(answers: List[Answer], bundle=None) -> pd.DataFrame:
     """
     Convert raw answers to feature vector matching training format
     """
+    bundle = bundle or default_bundle
+
     # Initialize features dictionary
     features = {}
 
     # Create answer lookup
     answer_map = {ans.questionId: ans.value for ans in answers}
 
-    # Academic score mapping
-    score_mapping = {
-        "0 – 35": 0,
-        "35 – 55": 1,
-        "55 – 75": 2,
-        "75 – 100": 3
-    }
-
-    # Process behavioral questions (4-23)
-    for q_id in range(4, 24):
+    # Behavioral (4-23) and academic (24-30) questions
+    for q_id in range(4, 31):
         if q_id in answer_map:
-            value = answer_map[q_id]
-            # For behavioral questions, map option to index (0-3)
-            # We need to determine which option index it is
-            features[f"q{q_id}"] = parse_behavioral_answer(q_id, value)
-        else:
-            features[f"q{q_id}"] = 0
-
-    # Process academic questions (24-30)
-    for q_id in range(24, 31):
-        if q_id in answer_map:
-            value = answer_map[q_id]
-            features[f"q{q_id}"] = score_mapping.get(value, 0)
+            features[f"q{q_id}"] = bundle.parse_answer(q_id, answer_map[q_id])
         else:
             features[f"q{q_id}"] = 0
 
@@ -169,145 +210,141 @@ def extract_features_from_answers(answers: List[Answer]) -> pd.DataFrame:
 
     # Convert to DataFrame with correct column order
     df = pd.DataFrame([features])
-    df = df[feature_names]  # Ensure correct column order
+    df = df[bundle.feature_names]  # Ensure correct column order
 
     return df
 
-def parse_behavioral_answer(question_id: int, answer_text: str) -> int:
-    """
-    Parse behavioral answer text to option index (0-3)
-    """
-    # Define answer mappings for each question
-    # This maps the answer text to its index
-    question_options = {
-        4: [
-            "Break it down into logical steps and analyze systematically",
-            "Research similar cases and apply proven solutions",
-            "Brainstorm creative alternatives and experiment",
-            "Discuss with others to understand different perspectives"
-        ],
-        5: [
-            "Laboratory or research facility with controlled environment",
-            "Hospital or clinic helping people directly",
-            "Workshop or site building tangible solutions",
-            "Office managing operations and people"
-        ],
-        6: [
-            "Analyze the root cause and suggest practical solutions",
-            "Offer emotional support and listen to their concerns",
-            "Share your experience and teach them skills",
-            "Connect them with resources or people who can help"
-        ],
-        7: [
-            "Study theory first, then practice systematically",
-            "Jump in and learn by doing",
-            "Watch demonstrations and replicate step-by-step",
-            "Combine multiple resources and experiment"
-        ],
-        8: [
-            "Take charge and coordinate the response",
-            "Stay calm and provide immediate practical help",
-            "Follow protocols and ensure safety procedures",
-            "Support others emotionally and maintain morale"
-        ],
-        9: [
-            "I love coding, building systems, and troubleshooting technical issues",
-            "I use it as a tool to enhance my work efficiency",
-            "I'm comfortable with standard applications but not programming",
-            "I prefer hands-on physical work over digital tools"
-        ],
-        10: [
-            "Discovering something new through research and experimentation",
-            "Designing and building a physical structure or product",
-            "Creating art, media, or visual experiences",
-            "Improving how organizations or communities function"
-        ],
-        11: [
-            "Data, statistics, and measurable evidence",
-            "Expert consultation and established best practices",
-            "Intuition and past experience",
-            "Consensus and input from affected people"
-        ],
-        12: [
-            "High - I find structure and routine comforting",
-            "Moderate - I can handle routine but need some variety",
-            "Low - I need constant change and new challenges",
-            "I can optimize routine tasks to make them efficient"
-        ],
-        13: [
-            "Focus on facts, logic, and accurate information",
-            "Listen actively and show empathy for feelings",
-            "Share stories and use vivid descriptions",
-            "Guide discussion toward practical outcomes"
-        ],
-        14: [
-            "I prefer mental challenges and intellectual work",
-            "I enjoy balanced combination of both",
-            "I thrive on physical activity and hands-on tasks",
-            "I prefer physical work but with planning elements"
-        ],
-        15: [
-            "Scientific accuracy and quality of results",
-            "Positive impact on people's lives",
-            "Innovation and originality of solution",
-            "Efficiency and profitability achieved"
-        ],
-        16: [
-            "Low - I need clear guidelines and procedures",
-            "Moderate - I can adapt but prefer some structure",
-            "High - I thrive in ambiguous and changing situations",
-            "I can handle uncertainty when there's a clear goal"
-        ],
-        17: [
-            "Intellectual curiosity and advancing knowledge",
-            "Saving lives and improving health",
-            "Financial success and business growth",
-            "Self-expression and creative freedom"
-        ],
-        18: [
-            "Analyze it objectively to improve quality",
-            "Feel concerned about others' wellbeing and perceptions",
-            "Defend my methods if I believe they're correct",
-            "Use it as learning opportunity for growth"
-        ],
-        19: [
-            "Lead by expertise and technical knowledge",
-            "Lead through vision and inspiration",
-            "Lead by organizing and delegating efficiently",
-            "Lead through collaboration and team empowerment"
-        ],
-        20: [
-            "Precision and accuracy of every detail",
-            "Positive outcome for people involved",
-            "Innovative or aesthetic quality of result",
-            "Meeting deadlines and budget constraints"
-        ],
-        21: [
-            "Reading, research, or intellectual hobbies",
-            "Volunteering or helping in your community",
-            "Creating art, music, or other creative projects",
-            "Outdoor activities, sports, or practical hobbies"
-        ],
-        22: [
-            "Logical analysis of outcomes and consequences",
-            "Compassion and minimizing harm to others",
-            "Following established rules and regulations",
-            "Balancing multiple stakeholder interests"
-        ],
-        23: [
-            "Thrive under pressure and deliver best work",
-            "Stay focused but feel stressed internally",
-            "Need careful planning to avoid last-minute pressure",
-            "Perform well but prefer more time for quality"
-        ]
-    }
-
-    if question_id in question_options:
-        options = question_options[question_id]
-        if answer_text in options:
-            return options.index(answer_text)
+# Academic score mapping
+ACADEMIC_SCORE_MAPPING = {
+    "0 – 35": 0,
+    "35 – 55": 1,
+    "55 – 75": 2,
+    "75 – 100": 3
+}
 
-    return 0  # Default
+# Answer options for each behavioral question, listed in option index order
+BEHAVIORAL_OPTIONS = {
+    4: [
+        "Break it down into logical steps and analyze systematically",
+        "Research similar cases and apply proven solutions",
+        "Brainstorm creative alternatives and experiment",
+        "Discuss with others to understand different perspectives"
+    ],
+    5: [
+        "Laboratory or research facility with controlled environment",
+        "Hospital or clinic helping people directly",
+        "Workshop or site building tangible solutions",
+        "Office managing operations and people"
+    ],
+    6: [
+        "Analyze the root cause and suggest practical solutions",
+        "Offer emotional support and listen to their concerns",
+        "Share your experience and teach them skills",
+        "Connect them with resources or people who can help"
+    ],
+    7: [
+        "Study theory first, then practice systematically",
+        "Jump in and learn by doing",
+        "Watch demonstrations and replicate step-by-step",
+        "Combine multiple resources and experiment"
+    ],
+    8: [
+        "Take charge and coordinate the response",
+        "Stay calm and provide immediate practical help",
+        "Follow protocols and ensure safety procedures",
+        "Support others emotionally and maintain morale"
+    ],
+    9: [
+        "I love coding, building systems, and troubleshooting technical issues",
+        "I use it as a tool to enhance my work efficiency",
+        "I'm comfortable with standard applications but not programming",
+        "I prefer hands-on physical work over digital tools"
+    ],
+    10: [
+        "Discovering something new through research and experimentation",
+        "Designing and building a physical structure or product",
+        "Creating art, media, or visual experiences",
+        "Improving how organizations or communities function"
+    ],
+    11: [
+        "Data, statistics, and measurable evidence",
+        "Expert consultation and established best practices",
+        "Intuition and past experience",
+        "Consensus and input from affected people"
+    ],
+    12: [
+        "High - I find structure and routine comforting",
+        "Moderate - I can handle routine but need some variety",
+        "Low - I need constant change and new challenges",
+        "I can optimize routine tasks to make them efficient"
+    ],
+    13: [
+        "Focus on facts, logic, and accurate information",
+        "Listen actively and show empathy for feelings",
+        "Share stories and use vivid descriptions",
+        "Guide discussion toward practical outcomes"
+    ],
+    14: [
+        "I prefer mental challenges and intellectual work",
+        "I enjoy balanced combination of both",
+        "I thrive on physical activity and hands-on tasks",
+        "I prefer physical work but with planning elements"
+    ],
+    15: [
+        "Scientific accuracy and quality of results",
+        "Positive impact on people's lives",
+        "Innovation and originality of solution",
+        "Efficiency and profitability achieved"
+    ],
+    16: [
+        "Low - I need clear guidelines and procedures",
+        "Moderate - I can adapt but prefer some structure",
+        "High - I thrive in ambiguous and changing situations",
+        "I can handle uncertainty when there's a clear goal"
+    ],
+    17: [
+        "Intellectual curiosity and advancing knowledge",
+        "Saving lives and improving health",
+        "Financial success and business growth",
+        "Self-expression and creative freedom"
+    ],
+    18: [
+        "Analyze it objectively to improve quality",
+        "Feel concerned about others' wellbeing and perceptions",
+        "Defend my methods if I believe they're correct",
+        "Use it as learning opportunity for growth"
+    ],
+    19: [
+        "Lead by expertise and technical knowledge",
+        "Lead through vision and inspiration",
+        "Lead by organizing and delegating efficiently",
+        "Lead through collaboration and team empowerment"
+    ],
+    20: [
+        "Precision and accuracy of every detail",
+        "Positive outcome for people involved",
+        "Innovative or aesthetic quality of result",
+        "Meeting deadlines and budget constraints"
+    ],
+    21: [
+        "Reading, research, or intellectual hobbies",
+        "Volunteering or helping in your community",
+        "Creating art, music, or other creative projects",
+        "Outdoor activities, sports, or practical hobbies"
+    ],
+    22: [
+        "Logical analysis of outcomes and consequences",
+        "Compassion and minimizing harm to others",
+        "Following established rules and regulations",
+        "Balancing multiple stakeholder interests"
+    ],
+    23: [
+        "Thrive under pressure and deliver best work",
+        "Stay focused but feel stressed internally",
+        "Need careful planning to avoid last-minute pressure",
+        "Perform well but prefer more time for quality"
+    ]
+}
 
 # Career-specific subcareers
 SUBCAREERS = {
@@ -324,46 +361,312 @@ SUBCAREERS = {
     "Education": ["Teacher", "Educational Administrator", "Curriculum Developer"]
 }
 
+def top_predictions(probabilities, bundle=None, k=3) -> List[CareerPrediction]:
+    """
+    Top k careers from a row of class probabilities
+    """
+    bundle = bundle or default_bundle
+    top_indices = np.argsort(probabilities)[::-1][:k]
+
+    predictions = []
+    for idx in top_indices:
+        career = bundle.classes[idx]
+        confidence = float(probabilities[idx])
+
+        predictions.append(CareerPrediction(
+            career=career,
+            confidence=round(confidence, 4),
+            subcareers=bundle.subcareers.get(career, [])
+        ))
+
+    return predictions
+
+async def get_bundle(model_version=None):
+    """
+    Bundle for the client's questionnaire version, loaded off the event
+    loop on first use. Raises HTTPException 404 for unknown versions and
+    500 if the bundle fails to load.
+    """
+    bundle = model_pool.peek(model_version)
+    if bundle is not None:
+        return bundle
+    try:
+        return await asyncio.to_thread(model_pool.get, model_version)
+    except UnknownVersion:
+        raise HTTPException(status_code=404,
+                            detail=f"Unknown model version: {model_version}")
+    except Exception as e:
+        raise HTTPException(status_code=500,
+                            detail=f"Failed to load model version {model_version}: {str(e)}")
+
 @app.post("/predict", response_model=PredictionResponse)
-async def predict_career(request: PredictionRequest):
+async def predict_career(request: PredictionRequest, background_tasks: BackgroundTasks):
     """
     Predict top 3 career paths based on user answers
     """
+    if model_pool is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    bundle = await get_bundle(request.model_version)
+
     try:
-        if model is None or label_encoder is None:
-            raise HTTPException(status_code=503, detail="Model not loaded")
+        start = time.perf_counter()
 
         # Extract features
-        X = extract_features_from_answers(request.answers)
+        X = extract_features_from_answers(request.answers, bundle)
 
         # Get predictions
-        probabilities = model.predict_proba(X)[0]
+        probabilities = bundle.model.predict_proba(X)[0]
+
+        # Hand a sample to the shadow model once the response has been sent
+        if (shadow_evaluator is not None and bundle is default_bundle
+                and shadow_evaluator.should_sample()):
+            background_tasks.add_task(
+                shadow_evaluator.submit, X, bundle.classes,
+                probabilities, time.perf_counter() - start
+            )
+
+        predictions = top_predictions(probabilities, bundle)
+
+        # Nearest historical respondents, distance = number of differing answers.
+        # Runs off the event loop since the index grows with logged answers
+        similar_respondents = None
+        if request.neighbors and similarity_index is not None:
+            neighbors = await asyncio.to_thread(
+                similarity_index.query, X[QUESTION_COLUMNS].to_numpy()[0], request.neighbors
+            )
+            similar_respondents = [
+                SimilarRespondent(career=career, distance=distance)
+                for career, distance in neighbors
+            ]
+
+        return PredictionResponse(
+            predictions=predictions,
+            metadata={
+                "model_version": bundle.metadata.get("version", bundle.version),
+                "model_accuracy": bundle.metadata.get("accuracy", 0),
+                "model_type": "XGBoost"
+            },
+            similar_respondents=similar_respondents
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+class SensitivityRequest(BaseModel):
+    # model_version is part of the public API, allow the "model_" prefix
+    model_config = ConfigDict(protected_namespaces=())
+
+    answers: List[Answer]
+    limit: int = Field(10, ge=1, le=81)
+    model_version: Optional[str] = None
+
+class AnswerChange(BaseModel):
+    questionId: int
+    current: str
+    alternative: str
+    top_career: str
+    top_confidence: float
+    confidence_delta: float
+    changes_top_career: bool
+
+class SensitivityResponse(BaseModel):
+    predictions: List[CareerPrediction]
+    changes: List[AnswerChange]
+    metadata: Dict
+
+@app.post("/predict/sensitivity", response_model=SensitivityResponse)
+async def predict_sensitivity(request: SensitivityRequest):
+    """
+    What-if analysis: change one answer at a time (each answered question x
+    3 alternatives) and return the changes that flip the top career or move
+    its confidence the most. All variants are scored in one booster call.
+
+    Answers are parsed with the schema of the requested model version and
+    any answer text that is not one of its options is rejected with 400.
+    Missing questions are scored as option 0, like /predict, but are never
+    offered as changes since there is no real current answer; they are
+    listed in the metadata.
+    """
+    if model_pool is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
 
-        # Get top 3 predictions
-        top_indices = np.argsort(probabilities)[::-1][:3]
+    bundle = await get_bundle(request.model_version)
 
-        predictions = []
-        for idx in top_indices:
-            career = label_encoder.classes_[idx]
-            confidence = float(probabilities[idx])
+    question_ids = list(range(4, 31))
+    answer_map = {ans.questionId: ans.value for ans in request.answers}
+    parsed = {
+        q_id: bundle.parse_answer(q_id, answer_map[q_id], default=None)
+        for q_id in question_ids if q_id in answer_map
+    }
+    unrecognized = [q_id for q_id, option in parsed.items() if option is None]
+    if unrecognized:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unrecognized answers for model version {bundle.version}, "
+                   f"questions: {unrecognized}"
+        )
 
-            predictions.append(CareerPrediction(
-                career=career,
-                confidence=round(confidence, 4),
-                subcareers=SUBCAREERS.get(career, [])
+    try:
+        layout = bundle.layout
+        unanswered = [q_id for q_id in question_ids if q_id not in answer_map]
+        base = np.array([parsed.get(q_id, 0) for q_id in question_ids])
+        answered = np.array([i for i, q_id in enumerate(question_ids) if q_id in parsed], dtype=int)
+
+        # Row 0 is the base answers, each later row swaps one answered
+        # question for one of its three alternatives
+        changed = np.repeat(answered, 3)
+        alternatives = (base[changed] + np.tile([1, 2, 3], len(answered))) % 4
+        answers = np.tile(base, (len(changed) + 1, 1))
+        answers[np.arange(1, len(changed) + 1), changed] = alternatives
+
+        probabilities = bundle.booster.inplace_predict(layout.build_rows(question_ids, answers))
+        base_probabilities, variants = probabilities[0], probabilities[1:]
+
+        base_top = int(np.argmax(base_probabilities))
+        variant_top = variants.argmax(axis=1)
+        flips = variant_top != base_top
+        delta = variants[:, base_top] - base_probabilities[base_top]
+
+        # Top career flips first, then largest confidence shift
+        order = np.lexsort((-np.abs(delta), ~flips))[:request.limit]
+
+        changes = []
+        for i in order:
+            q_id = question_ids[changed[i]]
+            changes.append(AnswerChange(
+                questionId=q_id,
+                current=bundle.option_text(q_id, int(base[changed[i]])),
+                alternative=bundle.option_text(q_id, int(alternatives[i])),
+                top_career=bundle.classes[variant_top[i]],
+                top_confidence=round(float(variants[i, variant_top[i]]), 4),
+                confidence_delta=round(float(delta[i]), 4),
+                changes_top_career=bool(flips[i])
             ))
 
-        return PredictionResponse(
-            predictions=predictions,
+        return SensitivityResponse(
+            predictions=top_predictions(base_probabilities, bundle),
+            changes=changes,
             metadata={
-                "model_version": model_metadata.get("version", "2.0"),
-                "model_accuracy": model_metadata.get("accuracy", 0),
-                "model_type": "XGBoost"
+                "model_version": bundle.metadata.get("version", bundle.version),
+                "variants_evaluated": len(changed),
+                "top_career_flips": int(flips.sum()),
+                "unanswered_questions": unanswered
             }
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Sensitivity error: {str(e)}")
+
+def parse_stream_message(text, bundle):
+    """
+    (question id, option index) pairs from one streaming message, parsed
+    with the bundle's answer schema. Raises ValueError with a message
+    suitable for the client.
+    """
+    try:
+        message = json.loads(text)
+    except ValueError:
+        raise ValueError("Message is not valid JSON")
+    if not isinstance(message, dict):
+        raise ValueError("Message must be a JSON object")
+
+    items = message.get("answers", [message])
+    if not isinstance(items, list) or not items:
+        raise ValueError("'answers' must be a non-empty list")
+
+    answers = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError("Each answer must be an object with questionId and value")
+        try:
+            answer = Answer(**item)
+        except ValidationError:
+            raise ValueError("Each answer needs an integer questionId and a string value")
+        if answer.questionId not in bundle.layout.question_index:
+            raise ValueError(f"Unknown questionId {answer.questionId}")
+        option = bundle.parse_answer(answer.questionId, answer.value, default=None)
+        if option is None:
+            raise ValueError(f"Unrecognized answer for question {answer.questionId} "
+                             f"under model version {bundle.version}")
+        answers.append((answer.questionId, option))
+    return answers
+
+@app.websocket("/predict/stream")
+async def predict_stream(websocket: WebSocket, session_id: Optional[str] = None,
+                         model_version: Optional[str] = None):
+    """
+    Progressive prediction while the questionnaire is being filled in.
+
+    Send {"questionId": 9, "value": "..."} (or {"answers": [...]}) after each
+    answer; an updated top 3 is pushed back together with the number of
+    questions answered so far. Unanswered questions are passed to the model
+    as missing, so early predictions rest on few answers and are less
+    certain than the final one. Reconnect with ?session_id=... to resume a
+    session that has not been evicted. Once every question is answered the
+    final prediction is sent with "complete": true, the session is
+    discarded and the socket is closed.
+
+    ?model_version=... selects the questionnaire version like /predict; a
+    resumed session keeps the version it was started with. Answer text
+    that is not an option of that version is rejected.
+    """
+    await websocket.accept()
+    if model_pool is None:
+        await websocket.close(code=1011, reason="Model not loaded")
+        return
+
+    session = session_store.get(session_id) if session_id else None
+    try:
+        bundle = await get_bundle(model_version or (session.version if session else None))
+    except HTTPException as e:
+        await websocket.close(code=4404 if e.status_code == 404 else 1011, reason=e.detail)
+        return
+
+    if session is not None and session.version != bundle.version:
+        await websocket.close(code=4409, reason=f"Session {session_id} was started "
+                                                f"with model version {session.version}")
+        return
+    if session is None:
+        session = session_store.create(bundle.layout, bundle.version, session_id)
+    session_id = session.session_id
+
+    try:
+        while True:
+            message = await websocket.receive_text()
+
+            if session_store.get(session_id) is None:
+                await websocket.close(code=4408, reason="Session expired")
+                return
+
+            try:
+                answers = parse_stream_message(message, bundle)
+            except ValueError as e:
+                await websocket.send_json({"session_id": session_id, "error": str(e)})
+                continue
+
+            for question_id, option in answers:
+                session.update(question_id, option)
+
+            probabilities = bundle.booster.inplace_predict(session.values)[0]
+            complete = len(session.answered) == len(bundle.layout.question_index)
+            await websocket.send_json({
+                "session_id": session_id,
+                "answered": len(session.answered),
+                "complete": complete,
+                "predictions": [p.model_dump() for p in top_predictions(probabilities, bundle)]
+            })
+
+            if complete:
+                session_store.discard(session_id)
+                await websocket.close(code=1000)
+                return
+
+    except WebSocketDisconnect:
+        # Session stays in the store for resumption until it is evicted
+        pass
 
 @app.get("/health")
 async def health_check():
@@ -371,9 +674,26 @@ async def health_check():
     return {
         "status": "healthy",
         "model_loaded": model is not None,
+        "stream_sessions": session_store.stats() if session_store is not None else None,
         "version": "2.0"
     }
 
+@app.get("/shadow/stats")
+async def shadow_stats():
+    """Agreement and latency of the shadow candidate model against the primary"""
+    if shadow_evaluator is None:
+        raise HTTPException(status_code=404, detail="Shadow model not configured")
+
+    return shadow_evaluator.report()
+
+@app.get("/models")
+async def model_pool_stats():
+    """Loaded model bundles with their memory use and hit counts"""
+    if model_pool is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    return model_pool.stats()
+
 @app.get("/model/info")
 async def model_info():
     """Get model information"""
@@ -382,6 +702,63 @@ async def model_info():
 
     return model_metadata
 
+def require_debug_token(x_debug_token: Optional[str] = Header(None)):
+    """Guard debug endpoints behind the CAREER_DEBUG_TOKEN environment variable"""
+    if not DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_debug_token or not secrets.compare_digest(x_debug_token, DEBUG_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+class ProfileRequest(BaseModel):
+    mode: str = Field("sample", pattern="^(sample|cpu|memory)$")
+    seconds: Optional[float] = Field(None, gt=0, le=profiling.MAX_SECONDS)
+    requests: Optional[int] = Field(None, gt=0, le=profiling.MAX_REQUESTS)
+
+@app.post("/debug/profile", dependencies=[Depends(require_debug_token)])
+async def start_profile(request: ProfileRequest):
+    """
+    Start a bounded profiling window: sample (stack sampling), cpu (cProfile)
+    or memory (tracemalloc). Ends after `seconds` or `requests`, whichever first.
+    """
+    try:
+        session = profiling.start_session(request.mode, request.seconds, request.requests)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if session.seconds is not None:
+        # Stop from the event loop thread, cProfile only unhooks the calling thread
+        asyncio.get_running_loop().call_later(
+            session.seconds, profiling.stop_session, session
+        )
+
+    return session.summary()
+
+@app.delete("/debug/profile", dependencies=[Depends(require_debug_token)])
+async def stop_profile():
+    """Stop the running profiling window early"""
+    session = profiling.stop_session()
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profiling session running")
+    return session.summary()
+
+@app.get("/debug/profile", dependencies=[Depends(require_debug_token)])
+async def profile_result(format: str = "text", limit: int = 40):
+    """
+    Get results of the last profiling window as text or collapsed stacks
+    """
+    session = profiling.current_session()
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profiling session recorded")
+    if session.running:
+        raise HTTPException(status_code=409, detail=session.summary())
+    if format not in ("text", "collapsed"):
+        raise HTTPException(status_code=400, detail="format must be 'text' or 'collapsed'")
+
+    try:
+        return PlainTextResponse(session.render(format, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,134 @@
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+LATENCY_WINDOW = 1000
+
+
+class ShadowEvaluator:
+    """
+    Scores a sample of live requests with a candidate model on a background
+    thread and aggregates agreement with the primary model.
+
+    The primary path only pays for a random draw and a non-blocking queue
+    put: when the queue is full the sample is dropped. The worker sleeps
+    after each request so it uses at most `cpu_share` of one core.
+    """
+
+    def __init__(self, bundle, sample_rate=0.1, queue_size=256, cpu_share=0.25):
+        self.bundle = bundle
+        self.sample_rate = sample_rate
+        self.cpu_share = min(max(cpu_share, 0.01), 1.0)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._primary_latency = deque(maxlen=LATENCY_WINDOW)
+        self._shadow_latency = deque(maxlen=LATENCY_WINDOW)
+        self._stats = {
+            "sampled": 0,
+            "scored": 0,
+            "dropped": 0,
+            "errors": 0,
+            "top1_agree": 0,
+            "top3_agree": 0,
+            "confidence_delta_sum": 0.0,
+            "confidence_abs_delta_sum": 0.0,
+        }
+        self._last_error = None
+
+        # Single-threaded booster so shadow scoring never competes for all cores
+        self.bundle.booster.set_param({"nthread": 1})
+
+        self._worker = threading.Thread(target=self._run, name="shadow-worker", daemon=True)
+        self._worker.start()
+
+    def should_sample(self):
+        return random.random() < self.sample_rate
+
+    def submit(self, X, primary_classes, primary_probabilities, primary_latency):
+        """Queue one request for shadow scoring, dropping it if the queue is full"""
+        try:
+            self._queue.put_nowait((X, primary_classes, primary_probabilities, primary_latency))
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            return
+        with self._lock:
+            self._stats["sampled"] += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            start = time.perf_counter()
+            try:
+                self._score(*item)
+            except Exception as e:
+                with self._lock:
+                    self._stats["errors"] += 1
+                    self._last_error = str(e)
+            busy = time.perf_counter() - start
+            # Throttle to the configured CPU share
+            time.sleep(busy * (1 - self.cpu_share) / self.cpu_share)
+
+    def _score(self, X, primary_classes, primary_probabilities, primary_latency):
+        start = time.perf_counter()
+        # Raw booster on a float32 array: the sklearn wrapper's DataFrame
+        # validation is Python work that holds the GIL the primary path needs,
+        # whereas inplace_predict releases it while the trees are evaluated
+        rows = X[self.bundle.feature_names].to_numpy(np.float32)
+        probabilities = self.bundle.booster.inplace_predict(rows)[0]
+        shadow_latency = time.perf_counter() - start
+
+        classes = self.bundle.classes
+        primary_top = [primary_classes[i] for i in np.argsort(primary_probabilities)[::-1][:3]]
+        shadow_top = [classes[i] for i in np.argsort(probabilities)[::-1][:3]]
+        confidence_delta = float(probabilities.max() - primary_probabilities.max())
+
+        with self._lock:
+            stats = self._stats
+            stats["scored"] += 1
+            stats["top1_agree"] += primary_top[0] == shadow_top[0]
+            stats["top3_agree"] += set(primary_top) == set(shadow_top)
+            stats["confidence_delta_sum"] += confidence_delta
+            stats["confidence_abs_delta_sum"] += abs(confidence_delta)
+            self._primary_latency.append(primary_latency)
+            self._shadow_latency.append(shadow_latency)
+
+    def report(self):
+        """Aggregated agreement, confidence and latency comparison"""
+        with self._lock:
+            stats = dict(self._stats)
+            primary_latency = np.array(self._primary_latency)
+            shadow_latency = np.array(self._shadow_latency)
+
+        scored = max(stats["scored"], 1)
+
+        def latency_ms(values):
+            if len(values) == 0:
+                return None
+            return {
+                "mean": round(float(values.mean()) * 1000, 3),
+                "p50": round(float(np.percentile(values, 50)) * 1000, 3),
+                "p95": round(float(np.percentile(values, 95)) * 1000, 3),
+            }
+
+        return {
+            "candidate_version": self.bundle.metadata.get("version"),
+            "sample_rate": self.sample_rate,
+            "cpu_share": self.cpu_share,
+            "queue_depth": self._queue.qsize(),
+            "sampled": stats["sampled"],
+            "scored": stats["scored"],
+            "dropped": stats["dropped"],
+            "errors": stats["errors"],
+            "last_error": self._last_error,
+            "top1_agreement": round(stats["top1_agree"] / scored, 4),
+            "top3_agreement": round(stats["top3_agree"] / scored, 4),
+            "mean_confidence_delta": round(stats["confidence_delta_sum"] / scored, 4),
+            "mean_abs_confidence_delta": round(stats["confidence_abs_delta_sum"] / scored, 4),
+            "primary_latency_ms": latency_ms(primary_latency),
+            "candidate_latency_ms": latency_ms(shadow_latency),
+        }
@@ -0,0 +1,247 @@
+import threading
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+# 27 questions (q4-q30), each answered with an option index 0-3
+QUESTION_COLUMNS = [f"q{q_id}" for q_id in range(4, 31)]
+BITS_PER_QUESTION = 2
+
+# Low bit of every 2-bit question slot, used to collapse a per-bit XOR into
+# one set bit per differing question
+_QUESTION_MASK = np.uint64(sum(1 << (BITS_PER_QUESTION * i) for i in range(len(QUESTION_COLUMNS))))
+_SHIFTS = np.arange(len(QUESTION_COLUMNS), dtype=np.uint64) * np.uint64(BITS_PER_QUESTION)
+
+# SWAR popcount constants (numpy < 2.0 has no np.bitwise_count)
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+
+def pack_answers(answers):
+    """
+    Pack an (n, 27) array of option indices into n uint64 codes, 2 bits per question
+    """
+    values = np.asarray(answers, dtype=np.uint64)
+    if values.ndim == 1:
+        values = values[np.newaxis, :]
+    values = np.clip(values, 0, 3)
+    return np.bitwise_or.reduce(values << _SHIFTS, axis=1)
+
+
+def popcount(codes):
+    """
+    Vectorized population count of a uint64 array
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(codes)
+
+    x = codes - ((codes >> np.uint64(1)) & _M1)
+    x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+    x = (x + (x >> np.uint64(4))) & _M4
+    return (x * _H01) >> np.uint64(56)
+
+
+def question_distance(codes, query):
+    """
+    Number of questions answered differently between each code and the query
+    """
+    diff = codes ^ np.uint64(query)
+    return popcount((diff | (diff >> np.uint64(1))) & _QUESTION_MASK)
+
+
+# Multi-index hashing: the 27 questions split into 3 blocks of 9. If two
+# vectors differ in d questions, some block differs in at most d // 3, so
+# probing each block's buckets at increasing radius finds all neighbours
+# without scanning the table.
+MIH_BLOCKS = 3
+MIH_BLOCK_QUESTIONS = 9
+_BLOCK_BITS = MIH_BLOCK_QUESTIONS * BITS_PER_QUESTION
+_BLOCK_MASK = np.uint64((1 << _BLOCK_BITS) - 1)
+
+# Below this many rows a linear scan is cheaper than probing buckets. The
+# scan costs ~25ns/row; probing has a ~0.5-5ms floor depending on how
+# clustered the answers are. Measured k=5 crossover: ~50k rows for
+# generate_dataset-like data, ~150k for uniform random answers.
+MIH_MIN_ROWS = 200000
+# Rows appended since the last bucket rebuild are scanned linearly until
+# there are this many of them
+MIH_MAX_TAIL = 20000
+# Fall back to a scan once probing has touched this share of the table
+MIH_MAX_CANDIDATE_SHARE = 0.25
+
+_probe_masks = {}
+
+
+def probe_masks(radius):
+    """
+    XOR masks that change exactly `radius` questions of a 9-question block
+    """
+    if radius not in _probe_masks:
+        masks = []
+        for positions in combinations(range(MIH_BLOCK_QUESTIONS), radius):
+            combined = np.zeros(1, dtype=np.uint64)
+            for p in positions:
+                options = np.arange(1, 4, dtype=np.uint64) << np.uint64(BITS_PER_QUESTION * p)
+                combined = (combined[:, np.newaxis] | options[np.newaxis, :]).ravel()
+            masks.append(combined)
+        _probe_masks[radius] = np.concatenate(masks)
+    return _probe_masks[radius]
+
+
+def _block_keys(codes, block):
+    """Block key of each code, tagged with the block number above the key bits"""
+    block = np.uint64(block) if np.isscalar(block) else block
+    return ((codes >> (np.uint64(_BLOCK_BITS) * block)) & _BLOCK_MASK) | (block << np.uint64(_BLOCK_BITS))
+
+
+def _gather_ranges(starts, stops):
+    """Concatenate arange(start, stop) for every pair, vectorized"""
+    lengths = stops - starts
+    lengths_total = int(lengths.sum())
+    if lengths_total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths_total)
+
+
+class HammingIndex:
+    """
+    In-memory nearest-respondent index over bit-packed answer vectors
+
+    Small tables are scanned linearly. From MIH_MIN_ROWS rows on, queries
+    probe per-block sorted bucket arrays (multi-index hashing); rows added
+    after the last rebuild are scanned until the tail reaches MIH_MAX_TAIL.
+    """
+
+    def __init__(self, capacity=1024):
+        self._codes = np.zeros(capacity, dtype=np.uint64)
+        self._labels = np.zeros(capacity, dtype=np.int32)
+        self._size = 0
+        self.classes = []
+        self._class_index = {}
+        self._lock = threading.Lock()
+        # (sorted block-tagged keys of all blocks, row ids in that order)
+        self._buckets = None
+        self._indexed = 0
+
+    def __len__(self):
+        return self._size
+
+    def _label_ids(self, careers):
+        codes, uniques = pd.factorize(pd.Series(careers))
+        for career in uniques:
+            if career not in self._class_index:
+                self._class_index[career] = len(self.classes)
+                self.classes.append(career)
+        mapping = np.array([self._class_index[c] for c in uniques], dtype=np.int32)
+        return mapping[codes]
+
+    def add(self, answers, careers):
+        """
+        Append answer vectors (n, 27) with their career labels
+        """
+        codes = pack_answers(answers)
+        if len(codes) != len(careers):
+            raise ValueError("answers and careers must have the same length")
+
+        with self._lock:
+            labels = self._label_ids(careers)
+
+            needed = self._size + len(codes)
+            if needed > len(self._codes):
+                capacity = max(needed, 2 * len(self._codes))
+                self._codes = np.resize(self._codes, capacity)
+                self._labels = np.resize(self._labels, capacity)
+
+            self._codes[self._size:needed] = codes
+            self._labels[self._size:needed] = labels
+            self._size = needed
+
+    def _rebuild_buckets(self):
+        codes = self._codes[:self._size]
+        # Tag each block key with its block number so all blocks share one
+        # sorted array and a probe round is a single searchsorted
+        keys = np.concatenate([
+            _block_keys(codes, block) for block in range(MIH_BLOCKS)
+        ])
+        order = np.argsort(keys, kind="stable")
+        self._buckets = (keys[order], (order % self._size).astype(np.int64))
+        self._indexed = self._size
+
+    @staticmethod
+    def _probe(codes, buckets, query_code, k, indexed):
+        """
+        Candidate rows among the first `indexed` rows that include the k
+        nearest, or None when probing stops paying off
+        """
+        keys, order = buckets
+        query_blocks = _block_keys(np.full(MIH_BLOCKS, query_code, dtype=np.uint64),
+                                   np.arange(MIH_BLOCKS, dtype=np.uint64))
+        candidates = np.zeros(0, dtype=np.int64)
+        for radius in range(MIH_BLOCK_QUESTIONS + 1):
+            probes = (query_blocks[:, np.newaxis] ^ probe_masks(radius)).ravel()
+            starts = np.searchsorted(keys, probes, side="left")
+            stops = np.searchsorted(keys, probes, side="right")
+            candidates = np.union1d(candidates, order[_gather_ranges(starts, stops)])
+
+            if len(candidates) > MIH_MAX_CANDIDATE_SHARE * indexed:
+                return None
+            # Every row within this distance has now been seen
+            bound = MIH_BLOCKS * radius + MIH_BLOCKS - 1
+            distances = question_distance(codes[candidates], query_code)
+            if np.count_nonzero(distances <= bound) >= k:
+                return candidates
+        return candidates
+
+    def query(self, answers, k=5):
+        """
+        Return the k nearest stored respondents as (career, distance) pairs,
+        closest first
+        """
+        with self._lock:
+            size = self._size
+            if size == 0 or k <= 0:
+                return []
+
+            if size >= MIH_MIN_ROWS and size - self._indexed > MIH_MAX_TAIL:
+                self._rebuild_buckets()
+            buckets = self._buckets
+            indexed = self._indexed if buckets is not None else 0
+            codes = self._codes[:size]
+            labels = self._labels[:size]
+
+        query_code = pack_answers(answers)[0]
+        k = min(k, size)
+
+        candidates = None
+        if indexed >= MIH_MIN_ROWS and k <= indexed:
+            candidates = self._probe(codes, buckets, query_code, k, indexed)
+        if candidates is None:
+            candidates = np.arange(size)
+        else:
+            candidates = np.concatenate([candidates, np.arange(indexed, size)])
+
+        distances = question_distance(codes[candidates], query_code)
+        if k < len(candidates):
+            top = np.argpartition(distances, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.lexsort((candidates[top], distances[top]))]
+
+        return [
+            (self.classes[labels[candidates[i]]], int(distances[i]))
+            for i in top
+        ]
+
+    @classmethod
+    def from_csv(cls, path):
+        """
+        Build an index from a CSV with q4-q30 columns and a career column
+        """
+        df = pd.read_csv(path)
+        index = cls(capacity=max(len(df), 1))
+        index.add(df[QUESTION_COLUMNS].to_numpy(), df["career"].to_numpy())
+        return index
@@ -5,76 +5,136 @@ from sklearn.metrics import classification_report, accuracy_score, confusion_mat
 import xgboost as xgb
 import joblib
 from preprocess import extract_features
+from perf import PerfReport, upstream_stages
 import json
+import time
+from pathlib import Path
 
-def train_model():
+def measure_inference(model, X_test, repeats=5, single_rows=100):
+    """
+    Measure batch throughput and single-row latency on the test split
+    """
+    batch_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(X_test)
+        batch_times.append(time.perf_counter() - start)
+    batch_seconds = float(np.median(batch_times))
+
+    single_times = []
+    for i in range(min(single_rows, len(X_test))):
+        row = X_test.iloc[[i]]
+        start = time.perf_counter()
+        model.predict_proba(row)
+        single_times.append(time.perf_counter() - start)
+
+    return {
+        "test_rows": len(X_test),
+        "batch_seconds": round(batch_seconds, 6),
+        "batch_rows_per_sec": round(len(X_test) / max(batch_seconds, 1e-9), 1),
+        "single_row_p50_ms": round(float(np.percentile(single_times, 50)) * 1000, 3),
+        "single_row_p95_ms": round(float(np.percentile(single_times, 95)) * 1000, 3),
+    }
+
+def train_model(data_path="ml/data/training_data.csv", models_dir="ml/models",
+                nthread=None, perf=None):
     """
     Train career prediction model using XGBoost with academic weighting
+
+    Stage timings, peak memory and inference throughput are recorded in
+    `perf` (a new PerfReport if not given) and saved with the model metadata.
+    Without a shared `perf`, the generate_report.json / preprocess_report.json
+    written next to data_path by the other pipeline scripts are merged in
+    when they were recorded for the current data file.
     """
+    if perf is None:
+        perf = PerfReport()
+        data_dir = Path(data_path).parent
+        for name in ("generate_report.json", "preprocess_report.json"):
+            perf.stages.extend(upstream_stages(data_dir / name, data_path))
+
     print("="*60)
     print("CAREER PREDICTION MODEL TRAINING")
     print("="*60)
 
     # Load data
-    print("\n[1/7] Loading training data...")
-    df = pd.read_csv("ml/data/training_data.csv")
-    print(f"Loaded {len(df)} samples across {df['career'].nunique()} careers")
+    with perf.stage("train: load data") as stage:
+        print("\n[1/7] Loading training data...")
+        df = pd.read_csv(data_path)
+        stage["rows"] = len(df)
+        print(f"Loaded {len(df)} samples across {df['career'].nunique()} careers")
 
     # Extract features
-    print("\n[2/7] Extracting features...")
-    X = extract_features(df)
-    y = df['career']
+    with perf.stage("train: extract features", rows=len(df)):
+        print("\n[2/7] Extracting features...")
+        X = extract_features(df)
+        y = df['career']
 
-    # Load label encoder
-    le = joblib.load('ml/models/label_encoder.pkl')
-    y_encoded = le.transform(y)
+        # Load label encoder
+        le = joblib.load(f'{models_dir}/label_encoder.pkl')
+        y_encoded = le.transform(y)
 
     print(f"Feature matrix shape: {X.shape}")
     print(f"Target classes: {list(le.classes_)}")
 
     # Split data
-    print("\n[3/7] Splitting data...")
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
-    )
+    with perf.stage("train: split", rows=len(df)):
+        print("\n[3/7] Splitting data...")
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
+        )
     print(f"Training samples: {len(X_train)}")
     print(f"Testing samples: {len(X_test)}")
 
     # Configure XGBoost model
-    print("\n[4/7] Configuring model...")
-    model = xgb.XGBClassifier(
-        n_estimators=200,
-        max_depth=8,
-        learning_rate=0.1,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        objective='multi:softprob',
-        eval_metric='mlogloss',
-        random_state=42,
-        tree_method='hist'
-    )
+    with perf.stage("train: configure"):
+        print("\n[4/7] Configuring model...")
+        model = xgb.XGBClassifier(
+            n_estimators=200,
+            max_depth=8,
+            learning_rate=0.1,
+            subsample=0.8,
+            colsample_bytree=0.8,
+            objective='multi:softprob',
+            eval_metric='mlogloss',
+            random_state=42,
+            tree_method='hist',
+            n_jobs=nthread
+        )
 
     # Train model
-    print("\n[5/7] Training model...")
-    model.fit(
-        X_train, y_train,
-        eval_set=[(X_test, y_test)],
-        verbose=False
-    )
+    with perf.stage("train: fit", rows=len(X_train)):
+        print("\n[5/7] Training model...")
+        model.fit(
+            X_train, y_train,
+            eval_set=[(X_test, y_test)],
+            verbose=False
+        )
     print("Training complete!")
 
     # Evaluate model
-    print("\n[6/7] Evaluating model...")
-    y_pred = model.predict(X_test)
-    y_pred_proba = model.predict_proba(X_test)
+    with perf.stage("train: evaluate", rows=len(X_test)):
+        print("\n[6/7] Evaluating model...")
+        y_pred = model.predict(X_test)
+        y_pred_proba = model.predict_proba(X_test)
 
-    accuracy = accuracy_score(y_test, y_pred)
-    print(f"\nTest Accuracy: {accuracy:.4f} ({accuracy*100:.2f}%)")
+        accuracy = accuracy_score(y_test, y_pred)
+        print(f"\nTest Accuracy: {accuracy:.4f} ({accuracy*100:.2f}%)")
 
     # Cross-validation
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='accuracy')
+    with perf.stage("train: cross-validate", rows=len(X_train)):
+        cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='accuracy')
     print(f"Cross-validation Accuracy: {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
 
+    # Inference throughput on the test split
+    with perf.stage("train: benchmark inference", rows=len(X_test)):
+        inference = measure_inference(model, X_test)
+    perf.extra["inference"] = inference
+    perf.extra["nthread"] = nthread
+    perf.extra["n_samples"] = len(df)
+    print(f"Inference: {inference['batch_rows_per_sec']:,.0f} rows/sec batched, "
+          f"{inference['single_row_p50_ms']:.2f} ms per single row (p50)")
+
     # Detailed classification report
     print("\n" + "="*60)
     print("CLASSIFICATION REPORT")
@@ -93,16 +153,17 @@ def train_model():
     print(feature_importance.head(10).to_string(index=False))
 
     # Save model
-    print("\n[7/7] Saving model...")
-    model_path = "ml/models/career_model.pkl"
-    joblib.dump(model, model_path)
-    print(f"Model saved to: {model_path}")
-
-    # Save feature names
-    feature_names_path = "ml/models/feature_names.json"
-    with open(feature_names_path, 'w') as f:
-        json.dump(list(X.columns), f)
-    print(f"Feature names saved to: {feature_names_path}")
+    with perf.stage("train: save model"):
+        print("\n[7/7] Saving model...")
+        model_path = f"{models_dir}/career_model.pkl"
+        joblib.dump(model, model_path)
+        print(f"Model saved to: {model_path}")
+
+        # Save feature names
+        feature_names_path = f"{models_dir}/feature_names.json"
+        with open(feature_names_path, 'w') as f:
+            json.dump(list(X.columns), f)
+        print(f"Feature names saved to: {feature_names_path}")
 
     # Save model metadata
     metadata = {
@@ -113,14 +174,24 @@ def train_model():
         "n_features": X.shape[1],
         "classes": list(le.classes_),
         "model_type": "XGBoost",
-        "version": "2.0"
+        "version": "2.0",
+        "performance": perf.to_dict()
     }
 
-    metadata_path = "ml/models/model_metadata.json"
+    metadata_path = f"{models_dir}/model_metadata.json"
     with open(metadata_path, 'w') as f:
         json.dump(metadata, f, indent=2)
     print(f"Metadata saved to: {metadata_path}")
 
+    report_path = f"{models_dir}/training_report.json"
+    perf.write(report_path)
+    print(f"Performance report saved to: {report_path}")
+
+    print("\n" + "="*60)
+    print("PERFORMANCE")
+    print("="*60)
+    perf.print_summary()
+
     print("\n" + "="*60)
     print("MODEL TRAINING COMPLETE!")
     print("="*60)
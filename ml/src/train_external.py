@@ -0,0 +1,352 @@
+"""
+External-memory training for datasets larger than RAM
+
+Features are extracted chunk by chunk into on-disk shards with a streaming
+stratified holdout split, then fed to XGBoost through a DataIter so only
+one shard is in memory at a time. The booster is checkpointed every few
+rounds and a re-run with the same work directory resumes from the last
+checkpoint.
+
+Usage:
+    python ml/src/train_external.py
+    python ml/src/train_external.py --data big.csv --work-dir /scratch/shards --chunk-size 500000
+    python ml/src/train_external.py --compare    # peak memory/throughput vs train.py
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import LabelEncoder
+
+from perf import PerfReport
+from preprocess import iter_feature_chunks
+
+# Same model configuration as train.train_model
+PARAMS = {
+    "max_depth": 8,
+    "learning_rate": 0.1,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "objective": "multi:softprob",
+    "eval_metric": "mlogloss",
+    "seed": 42,
+    "tree_method": "hist",
+}
+NUM_ROUNDS = 200
+TEST_SIZE = 0.2
+
+
+class ShardIter(xgb.DataIter):
+    """Feeds feature shards to XGBoost one at a time"""
+
+    def __init__(self, shard_paths, feature_names, cache_prefix):
+        self._shard_paths = shard_paths
+        self._feature_names = feature_names
+        self._it = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._it == len(self._shard_paths):
+            return 0
+        with np.load(self._shard_paths[self._it]) as shard:
+            input_data(data=shard["X"], label=shard["y"], feature_names=self._feature_names)
+        self._it += 1
+        return 1
+
+    def reset(self):
+        self._it = 0
+
+
+class CheckpointCallback(xgb.callback.TrainingCallback):
+    """Atomically save the booster every `interval` boosted rounds"""
+
+    def __init__(self, path, interval):
+        self.path = Path(path)
+        self.interval = interval
+        super().__init__()
+
+    def after_iteration(self, model, epoch, evals_log):
+        if model.num_boosted_rounds() % self.interval == 0:
+            tmp_path = self.path.with_name("checkpoint.tmp" + self.path.suffix)
+            model.save_model(tmp_path)
+            os.replace(tmp_path, self.path)
+        return False
+
+
+def fit_label_encoder(input_path, chunk_size):
+    """Fit the label encoder from the career column alone, streamed"""
+    careers = set()
+    for chunk in pd.read_csv(input_path, usecols=["career"], chunksize=chunk_size):
+        careers.update(chunk["career"].unique())
+    le = LabelEncoder()
+    le.fit(sorted(careers))
+    return le
+
+
+def stratified_holdout_mask(y, class_counts, test_size):
+    """
+    Streaming stratified split: within each class, a row goes to the holdout
+    whenever the running class count crosses the next multiple of 1/test_size,
+    so every class ends with test_size of its rows held out
+    """
+    mask = np.zeros(len(y), dtype=bool)
+    for c in np.unique(y):
+        positions = np.flatnonzero(y == c)
+        seen = class_counts[c] + np.arange(1, len(positions) + 1)
+        mask[positions] = np.floor(seen * test_size) > np.floor((seen - 1) * test_size)
+        class_counts[c] += len(positions)
+    return mask
+
+
+def write_feature_shards(input_path, shard_dir, le, chunk_size, test_size=TEST_SIZE):
+    """
+    Extract features chunk by chunk into train/holdout .npz shards. Returns
+    the shard manifest; shards from a completed run on the same input are reused.
+    """
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = shard_dir / "manifest.json"
+
+    stat = os.stat(input_path)
+    source = {
+        "path": str(Path(input_path).resolve()),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "chunk_size": chunk_size,
+        "test_size": test_size,
+    }
+    if manifest_path.exists():
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest["source"] == source:
+            print(f"Reusing {len(manifest['train'])} train / {len(manifest['holdout'])} holdout shards")
+            return manifest
+
+    manifest = {"source": source, "train": [], "holdout": [], "rows": {"train": 0, "holdout": 0}}
+    class_counts = np.zeros(len(le.classes_), dtype=np.int64)
+
+    for i, (X, careers) in enumerate(iter_feature_chunks(input_path, chunk_size)):
+        manifest["feature_names"] = list(X.columns)
+        values = X.to_numpy(dtype=np.float32)
+        y = le.transform(careers).astype(np.int32)
+        holdout = stratified_holdout_mask(y, class_counts, test_size)
+
+        for split, rows in (("train", ~holdout), ("holdout", holdout)):
+            if not rows.any():
+                continue
+            path = shard_dir / f"{split}-{i:06d}.npz"
+            np.savez(path, X=values[rows], y=y[rows])
+            manifest[split].append(str(path))
+            manifest["rows"][split] += int(rows.sum())
+
+        print(f"  shard {i}: {manifest['rows']['train']:,} train / "
+              f"{manifest['rows']['holdout']:,} holdout rows", flush=True)
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def evaluate_in_chunks(booster, shard_paths, n_classes):
+    """Accuracy and confusion matrix over holdout shards, one shard in memory at a time"""
+    confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+    for path in shard_paths:
+        with np.load(path) as shard:
+            y_pred = booster.inplace_predict(shard["X"]).argmax(axis=1)
+            np.add.at(confusion, (shard["y"], y_pred), 1)
+    accuracy = np.trace(confusion) / max(confusion.sum(), 1)
+    return float(accuracy), confusion
+
+
+def train_external(data_path="ml/data/training_data.csv", models_dir="ml/models",
+                   work_dir="ml/data/external", chunk_size=100000, nthread=None,
+                   checkpoint_interval=20, perf=None):
+    """
+    Train the career model from on-disk feature shards via external memory
+    """
+    perf = perf or PerfReport()
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = work_dir / "checkpoint.ubj"
+
+    print("="*60)
+    print("CAREER PREDICTION MODEL TRAINING (EXTERNAL MEMORY)")
+    print("="*60)
+
+    with perf.stage("external: fit label encoder"):
+        print("\n[1/6] Fitting label encoder...")
+        le = fit_label_encoder(data_path, chunk_size)
+    print(f"Target classes: {list(le.classes_)}")
+
+    with perf.stage("external: write shards") as stage:
+        print("\n[2/6] Extracting features into shards...")
+        manifest = write_feature_shards(data_path, work_dir / "shards", le, chunk_size)
+        stage["rows"] = manifest["rows"]["train"] + manifest["rows"]["holdout"]
+    print(f"Training samples: {manifest['rows']['train']}")
+    print(f"Testing samples: {manifest['rows']['holdout']}")
+
+    # Page cache from an interrupted run is not reusable, start it clean
+    cache_dir = work_dir / "cache"
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    cache_dir.mkdir()
+
+    with perf.stage("external: build DMatrix", rows=manifest["rows"]["train"]):
+        print("\n[3/6] Building external-memory DMatrix...")
+        dtrain = xgb.DMatrix(ShardIter(
+            manifest["train"], manifest["feature_names"], str(cache_dir / "dtrain")
+        ))
+
+    params = dict(PARAMS, num_class=len(le.classes_))
+    if nthread:
+        params["nthread"] = nthread
+
+    # A checkpoint older than the shards was trained on different data
+    manifest_path = work_dir / "shards" / "manifest.json"
+    if checkpoint_path.exists() and checkpoint_path.stat().st_mtime < manifest_path.stat().st_mtime:
+        checkpoint_path.unlink()
+
+    booster = None
+    if checkpoint_path.exists():
+        booster = xgb.Booster(model_file=str(checkpoint_path))
+        print(f"\nResuming from checkpoint at round {booster.num_boosted_rounds()}")
+    remaining = NUM_ROUNDS - (booster.num_boosted_rounds() if booster else 0)
+
+    with perf.stage("external: fit", rows=manifest["rows"]["train"]):
+        print("\n[4/6] Training model...")
+        if remaining > 0:
+            booster = xgb.train(
+                params, dtrain, num_boost_round=remaining, xgb_model=booster,
+                callbacks=[CheckpointCallback(checkpoint_path, checkpoint_interval)]
+            )
+    print("Training complete!")
+
+    del dtrain
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    with perf.stage("external: evaluate", rows=manifest["rows"]["holdout"]):
+        print("\n[5/6] Evaluating model...")
+        accuracy, confusion = evaluate_in_chunks(booster, manifest["holdout"], len(le.classes_))
+    print(f"\nTest Accuracy: {accuracy:.4f} ({accuracy*100:.2f}%)")
+
+    recall = np.diag(confusion) / np.maximum(confusion.sum(axis=1), 1)
+    precision = np.diag(confusion) / np.maximum(confusion.sum(axis=0), 1)
+    print(f"\n{'':<30}{'precision':>10}{'recall':>10}")
+    for name, p, r in zip(le.classes_, precision, recall):
+        print(f"{name:<30}{p:>10.2f}{r:>10.2f}")
+
+    with perf.stage("external: save model"):
+        print("\n[6/6] Saving model...")
+        models_dir = Path(models_dir)
+        booster_path = work_dir / "career_model.ubj"
+        booster.save_model(booster_path)
+
+        # Wrap in the sklearn estimator the service unpickles
+        model = xgb.XGBClassifier()
+        model.load_model(booster_path)
+        model_path = models_dir / "career_model.pkl"
+        joblib.dump(model, model_path)
+        joblib.dump(le, models_dir / "label_encoder.pkl")
+        with open(models_dir / "feature_names.json", 'w') as f:
+            json.dump(manifest["feature_names"], f)
+        print(f"Model saved to: {model_path}")
+
+    perf.extra["nthread"] = nthread
+    perf.extra["n_samples"] = manifest["rows"]["train"] + manifest["rows"]["holdout"]
+    metadata = {
+        "accuracy": accuracy,
+        "n_samples": perf.extra["n_samples"],
+        "n_features": len(manifest["feature_names"]),
+        "classes": list(le.classes_),
+        "model_type": "XGBoost",
+        "training_mode": "external_memory",
+        "version": "2.0",
+        "performance": perf.to_dict()
+    }
+    with open(models_dir / "model_metadata.json", 'w') as f:
+        json.dump(metadata, f, indent=2)
+    perf.write(models_dir / "training_report.json")
+
+    # Finished runs start fresh next time; shards are kept for reuse
+    checkpoint_path.unlink(missing_ok=True)
+
+    print("\n" + "="*60)
+    print("PERFORMANCE")
+    print("="*60)
+    perf.print_summary()
+
+    return booster, le, accuracy
+
+
+def _run_mode(mode, data_path, chunk_size, nthread):
+    """Run one training path in a scratch directory, returns its perf report"""
+    perf = PerfReport()
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        if mode == "external":
+            _, _, accuracy = train_external(data_path, models_dir=tmp, work_dir=tmp,
+                                            chunk_size=chunk_size, nthread=nthread, perf=perf)
+        else:
+            from preprocess import preprocess_data
+            from train import train_model
+            preprocess_data(data_path, models_dir=tmp, perf=perf)
+            _, _, accuracy = train_model(data_path, models_dir=tmp, nthread=nthread, perf=perf)
+
+    report = perf.to_dict()
+    report["accuracy"] = float(accuracy)
+    return report
+
+
+def compare(data_path, chunk_size, nthread):
+    """
+    Peak memory and throughput of the external-memory path against train.py,
+    each run in a fresh process
+    """
+    context = multiprocessing.get_context("spawn")
+    reports = {}
+    for mode in ("in_memory", "external"):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            reports[mode] = pool.submit(_run_mode, mode, data_path, chunk_size, nthread).result()
+
+    def fit_rate(report):
+        fit = next(s for s in report["stages"] if s["stage"].endswith(": fit"))
+        return fit.get("rows_per_sec", 0)
+
+    print(f"{'path':<12}{'total (s)':>11}{'fit rows/s':>12}{'peak RSS (MB)':>15}{'accuracy':>10}")
+    for mode, report in reports.items():
+        peak = f"{report['peak_rss_mb']:.1f}" if report["peak_rss_mb"] is not None else "n/a"
+        print(f"{mode:<12}{report['total_wall_seconds']:>11.2f}{fit_rate(report):>12,.0f}"
+              f"{peak:>15}{report['accuracy']:>10.4f}")
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="External-memory training")
+    parser.add_argument("--data", default="ml/data/training_data.csv")
+    parser.add_argument("--models-dir", default="ml/models")
+    parser.add_argument("--work-dir", default="ml/data/external")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--nthread", type=int, default=None)
+    parser.add_argument("--checkpoint-interval", type=int, default=20)
+    parser.add_argument("--compare", action="store_true",
+                        help="Compare peak memory and throughput with the in-memory path")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(args.data, args.chunk_size, args.nthread)
+    else:
+        train_external(args.data, args.models_dir, args.work_dir, args.chunk_size,
+                       args.nthread, args.checkpoint_interval)
+
+
+if __name__ == "__main__":
+    main()